@@ -4,6 +4,19 @@ Compare new model metrics (metrics.json) with the best registered model
 metric in Azure ML model registry. Writes 'improved.txt' containing
 "true" or "false".
 
+If the CHAMPION_LABEL environment variable is set (e.g. "latest" or a
+custom label), only the model version carrying that label is read instead
+of scanning every registered version; the scan is used as a fallback when
+the label does not resolve or that version lacks the metric.
+
+If BEST_METRIC_CACHE_PATH points at a JSON file, the best registered
+metric is cached there per workspace/model/metric and per CHAMPION_LABEL
+(or full scan). An entry younger than BEST_METRIC_CACHE_MAX_AGE seconds
+(default 3600) is used without creating an Azure ML client at all; an
+older entry is still reused, after a single lookup, while the model's
+latest version (or the version CHAMPION_LABEL points at) is the one it was
+computed for. Pass --no-cache to ignore the cache.
+
 Exit codes:
   0 - success (improved.txt written)
   2 - metrics.json not found
@@ -12,13 +25,57 @@ Exit codes:
 from __future__ import annotations
 
 import argparse
+import functools
 import json
+import logging
 import os
+import re
 import sys
-from typing import Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+# The Azure SDK is imported lazily: it is slow to import and not needed
+# when metrics.json is missing or the workspace is not configured.
+if TYPE_CHECKING:
+    from azure.ai.ml import MLClient
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Leading/trailing whitespace and quotes around tag keys and values.
+_STRIP_RE = re.compile(r"^[\s\"']+|[\s\"']+$")
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json accepts bytes too
+    _loads = json.loads
+
+# Tag keys tried when a version has no tag for the requested metric.
+FALLBACK_METRIC_KEYS = ("f1", "f1_score")
+
+# Max concurrent registry calls when reading tags of every model version.
+FETCH_WORKERS = 16
+# Seconds a value in BEST_METRIC_CACHE_PATH stays valid.
+CACHE_MAX_AGE = float(os.environ.get("BEST_METRIC_CACHE_MAX_AGE", "3600"))
 
-from azure.ai.ml import MLClient
-from azure.identity import AzureCliCredential, DefaultAzureCredential
+
+def _atomic_write(path: str, text: str) -> None:
+    """Write text to path via a temp file so readers never see a partial."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def _clean(s: str) -> str:
+    """Strip surrounding whitespace and quote characters in one pass."""
+    return _STRIP_RE.sub("", s)
 
 
 def parse_float(value: Any) -> Optional[float]:
@@ -28,23 +85,37 @@ def parse_float(value: Any) -> Optional[float]:
     if isinstance(value, (int, float)):
         return float(value)
     if isinstance(value, str):
-        s = value.strip().strip('"').strip("'")
-        try:
-            return float(s)
-        except ValueError:
-            pass
-        try:
-            parsed = json.loads(s)
-        except Exception:
-            parsed = None
-        if isinstance(parsed, (int, float)):
-            return float(parsed)
-        if isinstance(parsed, dict):
-            for v in parsed.values():
-                try:
-                    return float(v)
-                except Exception:
-                    continue
+        return _parse_float_str(value)
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_float_str(value: str) -> Optional[float]:
+    """String branch of parse_float; tag values repeat across versions."""
+    # Most metric tags are plain decimal strings; float() ignores whitespace.
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    s = _clean(value)
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    # Only a JSON object can still yield a number; skip decoding the
+    # common non-numeric strings ("n/a", "", ...).
+    if not s.startswith("{"):
+        return None
+    try:
+        parsed = _loads(s)
+    except Exception:
+        parsed = None
+    if isinstance(parsed, dict):
+        for v in parsed.values():
+            try:
+                return float(v)
+            except Exception:
+                continue
     return None
 
 
@@ -58,13 +129,12 @@ def _normalize_tags(raw_tags: Any) -> dict:
             if k is None:
                 continue
             key_norm = str(k).strip().lower()
-            val_norm = None if v is None else str(v).strip()
-            val_norm = val_norm.strip('"').strip("'") if val_norm else val_norm
+            val_norm = None if v is None else _clean(str(v))
             out[key_norm] = val_norm
         return out
     try:
         txt = str(raw_tags)
-        parsed = json.loads(txt)
+        parsed = _loads(txt)
         if isinstance(parsed, dict):
             for k, v in parsed.items():
                 if k is None:
@@ -78,18 +148,89 @@ def _normalize_tags(raw_tags: Any) -> dict:
     return out
 
 
-def _normalize_props(raw_props: Any) -> dict:
-    """Normalize properties dict keys to lowercase strings."""
-    out: dict = {}
-    if not raw_props or not isinstance(raw_props, dict):
-        return out
-    for k, v in raw_props.items():
-        try:
-            key_norm = str(k).strip().lower()
-        except Exception:
-            key_norm = str(k)
-        out[key_norm] = v
-    return out
+def _metric_aliases(metric_key: str) -> Tuple[str, ...]:
+    """Return normalized tag keys to try for metric_key, in order."""
+    lookup = metric_key.strip().lower()
+    keys = (lookup, lookup.replace("-", "_")) + FALLBACK_METRIC_KEYS
+    return tuple(dict.fromkeys(keys))
+
+
+def _version_metric_value(
+    ml_client: MLClient,
+    m: Any,
+    model_name: str,
+    aliases: Tuple[str, ...],
+    filtered: bool,
+) -> Optional[float]:
+    """Return the metric stored in the tags/properties of one version."""
+    try:
+        # Each item from list() may be lightweight. Try to get name/version.
+        m_name = getattr(m, "name", None)
+        m_version = getattr(m, "version", None)
+
+        if not m_name:
+            # Skip entries without names
+            return None
+
+        # Unfiltered listing: skip entries for other models.
+        if not filtered and (
+            str(m_name).strip().lower() != model_name.strip().lower()
+        ):
+            return None
+
+        # Versions listed by name already carry their tags; otherwise fetch
+        # the full model resource (tags often available only there).
+        full = m
+        if not (filtered and getattr(m, "tags", None)):
+            try:
+                if m_version:
+                    full = ml_client.models.get(
+                        name=m_name, version=m_version
+                    )
+                else:
+                    # If version missing, try to get latest by name (may raise)
+                    full = ml_client.models.get(name=m_name)
+            except Exception:
+                # If get fails, continue using the lightweight 'm' object.
+                full = m
+
+        # Inspect tags / properties (prefer tags on full resource).
+        raw_tags = getattr(full, "tags", None)
+        raw_props = getattr(full, "properties", None)
+
+        logger.debug(
+            "model=%s, version=%s, tags=%s, props=%s",
+            m_name,
+            m_version,
+            raw_tags,
+            raw_props,
+        )
+
+        if raw_tags and not isinstance(raw_tags, dict):
+            raw_tags = _normalize_tags(raw_tags)
+
+        # Keep only parseable alias keys; a tag wins over the property with
+        # the same key only when its value is a number.
+        matches: dict = {}
+        for src in (raw_tags, raw_props):
+            if not isinstance(src, dict):
+                continue
+            for k, v in src.items():
+                if k is None:
+                    continue
+                key = str(k).strip().lower()
+                if key in aliases and key not in matches:
+                    val = parse_float(v)
+                    if val is not None:
+                        matches[key] = val
+
+        for alt in aliases:
+            if alt in matches:
+                return matches[alt]
+    except Exception:
+        # Skip single model errors; continue scanning others.
+        pass
+    return None
 
 
 def get_best_existing_metric(
@@ -98,118 +239,130 @@ def get_best_existing_metric(
     metric_key: str,
 ) -> Optional[float]:
     """Return best numeric metric among registered models (or None)."""
-    best: Optional[float] = None
+    aliases = _metric_aliases(metric_key)
+    champion_label = os.environ.get("CHAMPION_LABEL")
+    if champion_label:
+        try:
+            champion = ml_client.models.get(
+                name=model_name, label=champion_label
+            )
+        except Exception as exc:
+            # Unknown label, auth error or an SDK without label=: scan.
+            print("Warning: champion label lookup failed:", exc)
+            champion = None
+        if champion is not None:
+            val = _version_metric_value(
+                ml_client, champion, model_name, aliases, True
+            )
+            if val is not None:
+                print(
+                    "Using %s from model labelled '%s' (version %s)"
+                    % (metric_key, champion_label, champion.version)
+                )
+                return val
 
-    # Try to call list() with a name filter if supported by SDK.
+    # Try to call list() with a name filter if supported by SDK; the service
+    # then only returns versions of model_name instead of the whole registry.
     try:
         candidates = ml_client.models.list(name=model_name)  # type: ignore
+        filtered = True
     except TypeError:
         # Older SDK signatures may not accept 'name' arg; fall back to listing all.
         candidates = ml_client.models.list()  # type: ignore
+        filtered = False
 
     try:
-        for m in candidates:
-            try:
-                # Each item from list() may be lightweight. Try to get name/version.
-                m_name = getattr(m, "name", None)
-                m_version = getattr(m, "version", None)
-
-                if not m_name:
-                    # Skip entries without names
-                    continue
-
-                # If model name doesn't match exactly, skip.
-                if str(m_name).strip().lower() != model_name.strip().lower():
-                    continue
-
-                # Fetch the full model resource (tags often available only there).
-                full = None
-                try:
-                    if m_version:
-                        full = ml_client.models.get(name=m_name, version=m_version)
-                    else:
-                        # If version missing, try to get latest by name (may raise)
-                        full = ml_client.models.get(name=m_name)
-                except Exception:
-                    # If get fails, continue using the lightweight 'm' object.
-                    full = m
-
-                # Inspect tags / properties (prefer tags on full resource).
-                raw_tags = getattr(full, "tags", None)
-                raw_props = getattr(full, "properties", None)
-
-                # Debug — will show in CI logs; remove once verified.
-                print(
-                    "DEBUG: model=%s, version=%s, tags=%s, props=%s"
-                    % (str(m_name), str(m_version), str(raw_tags), str(raw_props))
-                )
-
-                # Normalize tags (keys lowercased, stripped)
-                normalized = {}
-                if isinstance(raw_tags, dict):
-                    for k, v in raw_tags.items():
-                        if k is None:
-                            continue
-                        nk = str(k).strip().lower()
-                        nv = None if v is None else str(v).strip().strip('"').strip("'")
-                        normalized[nk] = nv
-
-                lookup = metric_key.strip().lower()
-                raw_val = normalized.get(lookup)
-                if raw_val is None:
-                    for alt in (lookup, lookup.replace("-", "_"), "f1", "f1_score"):
-                        raw_val = normalized.get(alt)
-                        if raw_val is not None:
-                            break
-
-                val = parse_float(raw_val)
-                if val is not None and (best is None or val > best):
-                    best = val
-                    # keep checking other versions
-                    continue
-
-                # Fallback to properties if present
-                pnorm = {}
-                if isinstance(raw_props, dict):
-                    for k, v in raw_props.items():
-                        try:
-                            k_norm = str(k).strip().lower()
-                        except Exception:
-                            k_norm = str(k)
-                        pnorm[k_norm] = v
-
-                p_raw = pnorm.get(lookup)
-                if p_raw is None:
-                    for alt in ("f1", "f1_score"):
-                        p_raw = pnorm.get(alt)
-                        if p_raw is not None:
-                            break
-                val = parse_float(p_raw)
-                if val is not None and (best is None or val > best):
-                    best = val
-            except Exception:
-                # Skip single model errors; continue scanning others.
-                continue
+        versions = list(candidates)
+        # Per-version get() calls are independent network round-trips.
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            results = pool.map(
+                lambda m: _version_metric_value(
+                    ml_client, m, model_name, aliases, filtered
+                ),
+                versions,
+            )
+            best = max(
+                (val for val in results if val is not None), default=None
+            )
     except Exception as exc:
         print("Warning: failed to list or parse models:", exc)
         return None
 
-    print("DEBUG: Best existing %s: %s" % (metric_key, str(best)))
+    logger.debug("Best existing %s: %s", metric_key, best)
     return best
 
 
-def find_metrics_file(model_dir: str) -> Optional[str]:
-    """Search common locations for metrics.json."""
+def load_metrics_file(model_dir: str) -> Optional[dict]:
+    """Load metrics.json from the first common location that has it."""
     candidates = [
         os.path.join(model_dir, "metrics.json"),
         os.path.join(model_dir, "named-outputs", "model", "metrics.json"),
     ]
     for c in candidates:
-        if os.path.exists(c):
-            return c
+        try:
+            with open(c, "rb") as fh:
+                return _loads(fh.read())
+        except FileNotFoundError:
+            continue
     return None
 
 
+def get_ml_client(
+    subscription_id: str,
+    resource_group: str,
+    workspace: str,
+) -> MLClient:
+    """Return an MLClient for the workspace, authenticated via the CLI."""
+    from azure.ai.ml import MLClient
+    from azure.identity import AzureCliCredential, DefaultAzureCredential
+
+    try:
+        cred = AzureCliCredential()
+    except Exception:
+        cred = DefaultAzureCredential()
+    return MLClient(cred, subscription_id, resource_group, workspace)
+
+
+def labelled_model_version(
+    ml_client: MLClient, model_name: str, label: str
+) -> Optional[str]:
+    """Return the version of model_name that label points at, if any."""
+    try:
+        labelled = ml_client.models.get(name=model_name, label=label)
+    except Exception:
+        return None
+    version = getattr(labelled, "version", None)
+    return None if version is None else str(version)
+
+
+def read_cache_entry(cache_path: str, key: str) -> Optional[dict]:
+    """Return the cached {value, ts, version} entry for key, if any."""
+    try:
+        with open(cache_path, "rb") as fh:
+            entry = _loads(fh.read()).get(key)
+    except (OSError, ValueError, AttributeError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def write_cache_entry(
+    cache_path: str, key: str, value: float, version: Optional[str]
+) -> None:
+    """Store the best metric (and the version it was computed for)."""
+    try:
+        with open(cache_path, "rb") as fh:
+            cache = _loads(fh.read())
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    cache[key] = {"value": value, "ts": time.time(), "version": version}
+    try:
+        _atomic_write(cache_path, json.dumps(cache))
+    except OSError as exc:
+        print("Warning: failed to write metric cache:", exc)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Compare model metrics.")
     parser.add_argument("--model_dir", required=True)
@@ -227,80 +380,125 @@ def main() -> int:
         "--workspace",
         default=os.environ.get("AZURE_ML_WORKSPACE_NAME"),
     )
-    args = parser.parse_args()
-
-    metrics_file = find_metrics_file(args.model_dir)
-    if not metrics_file:
-        with open("improved.txt", "w", encoding="utf8") as fh:
-            fh.write("false")
-        print("metrics.json not found in expected locations.", file=sys.stderr)
-        return 2
-
-    with open(metrics_file, "r", encoding="utf8") as fh:
-        metrics = json.load(fh)
-
-    new_val = parse_float(
-        metrics.get(args.primary_metric)
-        or metrics.get("f1")
-        or metrics.get("f1_score")
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Ignore BEST_METRIC_CACHE_PATH and always scan the registry",
     )
+    args = parser.parse_args()
 
-    print("New model metrics:", metrics)
-    print(
-        "Primary metric (%s) value: %s"
-        % (
-            args.primary_metric,
-            str(new_val),
+    # improved.txt is written exactly once, on every exit path.
+    improved = False
+    try:
+        metrics = load_metrics_file(args.model_dir)
+        if metrics is None:
+            print(
+                "metrics.json not found in expected locations.",
+                file=sys.stderr,
+            )
+            return 2
+
+        new_val = parse_float(
+            metrics.get(args.primary_metric)
+            or metrics.get("f1")
+            or metrics.get("f1_score")
         )
-    )
 
-    if not (args.subscription_id and args.resource_group and args.workspace):
+        print("New model metrics:", metrics)
         print(
-            "subscription/resource_group/workspace must be provided",
-            file=sys.stderr,
+            "Primary metric (%s) value: %s"
+            % (
+                args.primary_metric,
+                str(new_val),
+            )
         )
-        with open("improved.txt", "w", encoding="utf8") as fh:
-            fh.write("false")
-        return 3
-
-    try:
-        cred = AzureCliCredential()
-    except Exception:
-        cred = DefaultAzureCredential()
 
-    ml_client = MLClient(
-        cred,
-        args.subscription_id,
-        args.resource_group,
-        args.workspace,
-    )
-
-    existing_best = get_best_existing_metric(
-        ml_client,
-        args.model_name,
-        args.primary_metric,
-    )
-    print(
-        "Existing best %s for model '%s': %s"
-        % (
-            args.primary_metric,
+        if not (
+            args.subscription_id and args.resource_group and args.workspace
+        ):
+            print(
+                "subscription/resource_group/workspace must be provided",
+                file=sys.stderr,
+            )
+            return 3
+
+        cache_path = (
+            None if args.no_cache else os.environ.get("BEST_METRIC_CACHE_PATH")
+        )
+        # The champion lookup and the full scan answer different questions,
+        # so they are cached separately.
+        cache_key = "%s/%s/%s/%s:%s@%s" % (
+            args.subscription_id,
+            args.resource_group,
+            args.workspace,
             args.model_name,
-            str(existing_best),
+            args.primary_metric,
+            os.environ.get("CHAMPION_LABEL") or "scan",
+        )
+        entry = read_cache_entry(cache_path, cache_key) if cache_path else None
+        existing_best = None
+        if entry is not None:
+            ts = parse_float(entry.get("ts"))
+            if ts is not None and time.time() - ts < CACHE_MAX_AGE:
+                existing_best = parse_float(entry.get("value"))
+
+        if existing_best is None:
+            ml_client = get_ml_client(
+                args.subscription_id,
+                args.resource_group,
+                args.workspace,
+            )
+
+            # An expired entry is still valid while the version it was
+            # computed for is unchanged: the newest one for a scan, or the
+            # one CHAMPION_LABEL points at.
+            version = (
+                labelled_model_version(
+                    ml_client,
+                    args.model_name,
+                    os.environ.get("CHAMPION_LABEL") or "latest",
+                )
+                if cache_path
+                else None
+            )
+            if (
+                entry is not None
+                and version is not None
+                and entry.get("version") == version
+            ):
+                existing_best = parse_float(entry.get("value"))
+
+            if existing_best is None:
+                existing_best = get_best_existing_metric(
+                    ml_client,
+                    args.model_name,
+                    args.primary_metric,
+                )
+            if cache_path and existing_best is not None:
+                write_cache_entry(
+                    cache_path, cache_key, existing_best, version
+                )
+        print(
+            "Existing best %s for model '%s': %s"
+            % (
+                args.primary_metric,
+                args.model_name,
+                str(existing_best),
+            )
         )
-    )
-
-    if existing_best is None:
-        improved = True
-    elif new_val is None:
-        improved = False
-    else:
-        improved = new_val > existing_best
-
-    with open("improved.txt", "w", encoding="utf8") as fh:
-        fh.write("true" if improved else "false")
 
-    print("IMPROVED:", improved)
-    return 0
+        if existing_best is None:
+            improved = True
+        elif new_val is None:
+            improved = False
+        else:
+            improved = new_val > existing_best
+
+        print("IMPROVED:", improved)
+        return 0
+    finally:
+        _atomic_write("improved.txt", "true" if improved else "false")
 
 
 if __name__ == "__main__":
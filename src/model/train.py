@@ -12,14 +12,32 @@ import logging
 import json
 import joblib
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import (
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
-)
+from sklearn.metrics import precision_recall_fscore_support
 import mlflow
+import mlflow.sklearn
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    _PYARROW_VERSION = tuple(
+        int(p) for p in pa.__version__.split(".")[:2] if p.isdigit()
+    )
+except ImportError:  # fall back to pandas' CSV reader
+    pa = None
+
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+except ImportError:  # orjson is optional
+    def _dumps(obj):
+        return json.dumps(obj).encode("utf8")
+
+# Upper bound on CSV files parsed concurrently by get_csvs_df.
+CSV_READ_WORKERS = 8
 
 logging.basicConfig(
     level=logging.INFO,
@@ -30,8 +48,9 @@ logger = logging.getLogger(__name__)
 
 
 def main(args):
-    # Enable autologging
-    mlflow.autolog()
+    # Autolog the sklearn model (the pipeline registers artifacts/model),
+    # but not post-training metrics: train_model logs its own in one call.
+    mlflow.sklearn.autolog(log_post_training_metrics=False)
     logger.info("Starting training run")
     logger.info("Arguments: %s", args)
 
@@ -81,6 +100,32 @@ def main(args):
         logger.warning("Failed to list output dir contents: %s", e)
 
 
+def _atomic_write(path, data: bytes):
+    """Write data to path via a temp file so readers never see a partial."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def _read_arrow_csv(path):
+    """Read one CSV with pyarrow, matching what pd.read_csv returns."""
+    # Empty string fields are NaN in pandas, not a "" category.
+    options = pacsv.ConvertOptions(strings_can_be_null=True)
+    table = pacsv.read_csv(path, convert_options=options)
+    # pandas leaves dates and times as text, which split_data one-hot
+    # encodes; re-read such columns as strings so the text is verbatim.
+    temporal = {
+        field.name: pa.string()
+        for field in table.schema
+        if pa.types.is_temporal(field.type)
+    }
+    if temporal:
+        options.column_types = temporal
+        table = pacsv.read_csv(path, convert_options=options)
+    return table
+
+
 def get_csvs_df(path):
     if not os.path.exists(path):
         raise RuntimeError(
@@ -91,7 +136,29 @@ def get_csvs_df(path):
         raise RuntimeError(
             f"No CSV files found in provided data path: {path}"
         )
-    return pd.concat((pd.read_csv(f) for f in csv_files), sort=False)
+    # Both parsers release the GIL, so files are read concurrently.
+    reader = pd.read_csv if pa is None else _read_arrow_csv
+    with ThreadPoolExecutor(
+        max_workers=min(len(csv_files), CSV_READ_WORKERS)
+    ) as pool:
+        parts = list(pool.map(reader, csv_files))
+    if pa is None:
+        return pd.concat(parts, sort=False)
+    # Concatenate Arrow tables and convert to pandas once. "permissive"
+    # upcasts int64/double mismatches across files like pd.concat does.
+    try:
+        if _PYARROW_VERSION >= (14, 0):
+            table = pa.concat_tables(parts, promote_options="permissive")
+        else:  # promote=True only null-fills columns missing from a file
+            table = pa.concat_tables(parts, promote=True)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # Conflicting per-file types (int vs string, bool vs int, or int vs
+        # double before pyarrow 14): let pandas reconcile them instead.
+        return pd.concat([t.to_pandas() for t in parts], sort=False)
+    # Drop the per-file references so Arrow buffers can be released column
+    # by column while converting, instead of holding both copies at once.
+    del parts
+    return table.to_pandas(split_blocks=True, self_destruct=True)
 
 
 # 🟥 >>> ADDED CODE START
@@ -112,23 +179,30 @@ def split_data(
     X = df.drop(columns=[target])
 
     X = X.dropna(axis=1, how="all")
-    for col in X.select_dtypes(include=["bool"]).columns:
-        X[col] = X[col].astype(int)
+    bool_cols = X.select_dtypes(include=["bool"]).columns
+    if len(bool_cols):
+        X[bool_cols] = X[bool_cols].astype(np.int8)
 
     obj_cols = X.select_dtypes(include=["object", "category"]).columns.tolist()
     if obj_cols:
         logger.info("Encoding categorical columns: %s", obj_cols)
         X = pd.get_dummies(X, columns=obj_cols, drop_first=True)
 
-    for col in X.select_dtypes(include=[np.number]).columns:
-        X[col] = X[col].fillna(X[col].median())
+    num_cols = X.select_dtypes(include=[np.number]).columns
+    if len(num_cols):
+        X[num_cols] = X[num_cols].fillna(X[num_cols].median())
+
+    # Stratify only with 2+ classes; comparing against the first label is
+    # exact and avoids hashing the whole target like nunique() does.
+    y_values = y.to_numpy()
+    has_classes = len(y_values) > 0 and bool((y_values != y_values[0]).any())
 
     X_train, X_test, y_train, y_test = train_test_split(
         X,
         y,
         test_size=test_size,
         random_state=random_state,
-        stratify=(y if y.nunique() > 1 else None),
+        stratify=(y if has_classes else None),
     )
 
     return X_train, X_test, y_train, y_test
@@ -142,23 +216,13 @@ def train_model(reg_rate, X_train, X_test, y_train, y_test, output_dir: str):
     )
     preds = clf.predict(X_test)
 
-    acc = accuracy_score(y_test, preds)
-    prec = precision_score(
-        y_test,
-        preds,
-        average="binary" if len(np.unique(y_test)) == 2 else "weighted",
-        zero_division=0,
-    )
-    rec = recall_score(
-        y_test,
+    # Convert labels once and reuse them for every metric.
+    y_true = np.asarray(y_test)
+    acc = float(np.mean(y_true == preds))
+    prec, rec, f1, _ = precision_recall_fscore_support(
+        y_true,
         preds,
-        average="binary" if len(np.unique(y_test)) == 2 else "weighted",
-        zero_division=0,
-    )
-    f1 = f1_score(
-        y_test,
-        preds,
-        average="binary" if len(np.unique(y_test)) == 2 else "weighted",
+        average="binary" if np.unique(y_true).size == 2 else "weighted",
         zero_division=0,
     )
 
@@ -170,11 +234,14 @@ def train_model(reg_rate, X_train, X_test, y_train, y_test, output_dir: str):
         f1,
     )
 
+    metrics = {
+        "accuracy": float(acc),
+        "precision": float(prec),
+        "recall": float(rec),
+        "f1": float(f1),
+    }
     try:
-        mlflow.log_metric("accuracy", float(acc))
-        mlflow.log_metric("precision", float(prec))
-        mlflow.log_metric("recall", float(rec))
-        mlflow.log_metric("f1", float(f1))
+        mlflow.log_metrics(metrics)
         mlflow.log_param("reg_rate", float(reg_rate))
     except Exception as e:
         logger.warning("MLflow logging failed: %s", e)
@@ -193,16 +260,9 @@ def train_model(reg_rate, X_train, X_test, y_train, y_test, output_dir: str):
     except Exception as e:
         logger.warning("Failed to save model: %s", e)
 
-    metrics = {
-        "accuracy": float(acc),
-        "precision": float(prec),
-        "recall": float(rec),
-        "f1": float(f1),
-    }
     metrics_path = os.path.join(out_dir, "metrics.json")
     try:
-        with open(metrics_path, "w") as fh:
-            json.dump(metrics, fh)
+        _atomic_write(metrics_path, _dumps(metrics))
         logger.info("Saved metrics to %s", metrics_path)
     except Exception as e:
         logger.warning("Failed to save metrics: %s", e)
@@ -7,6 +7,7 @@ import argparse
 import json
 import os
 import sys
+from pathlib import Path
 from typing import Optional
 import glob
 
@@ -27,10 +28,18 @@ def parse_float(value: object) -> Optional[float]:
 
 def load_metrics(metrics_path: str) -> dict:
     """Load metrics.json if present, otherwise return empty dict."""
-    if not os.path.exists(metrics_path):
+    try:
+        with open(metrics_path, "r", encoding="utf8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
         return {}
-    with open(metrics_path, "r", encoding="utf8") as fh:
-        return json.load(fh)
+
+
+def tag_value(value: object) -> str:
+    """Render a metric as a tag string; composite values become JSON."""
+    if isinstance(value, (str, int, float, bool)):
+        return str(value)
+    return json.dumps(value)
 
 
 def find_mlmodel(root: str) -> Optional[str]:
@@ -94,16 +103,18 @@ def main() -> int:
         return 2
 
     metrics = load_metrics(os.path.join(args.model_dir, "metrics.json"))
-    tag_metrics = {k: str(v) for k, v in metrics.items() if v is not None}
-
-    mlfpath = os.path.join(args.model_dir, "mlflow_run_id.txt")
-    if os.path.exists(mlfpath):
-        try:
-            with open(mlfpath, "r", encoding="utf8") as fh:
-                tag_metrics["mlflow_run_id"] = fh.read().strip()
-        except Exception:
-            # non-fatal: skip mlflow id if reading fails
-            pass
+    tag_metrics = {
+        k: tag_value(v) for k, v in metrics.items() if v is not None
+    }
+
+    mlfpath = Path(args.model_dir, "mlflow_run_id.txt")
+    try:
+        tag_metrics["mlflow_run_id"] = mlfpath.read_text(
+            encoding="utf8"
+        ).strip()
+    except (OSError, UnicodeDecodeError):
+        # non-fatal: skip mlflow id if it is missing or unreadable
+        pass
 
     if not (
         args.subscription_id and args.resource_group and args.workspace
@@ -0,0 +1,196 @@
+# tests/test_compare_metrics.py
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import compare_metrics
+from compare_metrics import get_best_existing_metric
+
+
+def _model(version, tags=None, properties=None, name="diabetes"):
+    return SimpleNamespace(
+        name=name, version=version, tags=tags, properties=properties
+    )
+
+
+class _FakeModels:
+    """Stand-in for MLClient.models backed by a list of model versions."""
+
+    def __init__(self, versions, labels=None):
+        self.versions = versions
+        self.labels = labels or {}
+        self.list_calls = 0
+
+    def list(self, name=None):
+        self.list_calls += 1
+        return [m for m in self.versions if name in (None, m.name)]
+
+    def get(self, name, version=None, label=None):
+        if label is not None:
+            if label not in self.labels:
+                raise LookupError(label)
+            version = self.labels[label]
+        for m in self.versions:
+            if m.name == name and str(m.version) == str(version):
+                return m
+        raise LookupError(name)
+
+
+def _client(*versions, labels=None):
+    return SimpleNamespace(models=_FakeModels(list(versions), labels))
+
+
+@pytest.fixture(autouse=True)
+def _no_champion_label(monkeypatch):
+    monkeypatch.delenv("CHAMPION_LABEL", raising=False)
+
+
+def test_best_existing_metric_is_max_across_versions():
+    client = _client(
+        _model("1", tags={"f1": "0.4"}),
+        _model("2", tags={"f1": "0.7"}),
+        _model("3", tags={"accuracy": "0.9"}),
+        _model("1", tags={"f1": "0.99"}, name="other"),
+    )
+    assert get_best_existing_metric(client, "diabetes", "f1") == 0.7
+
+
+def test_unparseable_tag_falls_back_to_property():
+    client = _client(
+        _model("1", tags={"f1": "n/a"}, properties={"f1": "0.9"}),
+        _model("2", tags={"f1": None}, properties={"f1": 0.8}),
+    )
+    assert get_best_existing_metric(client, "diabetes", "f1") == 0.9
+    client = _client(
+        _model("2", tags={"f1": None}, properties={"f1": 0.8}),
+    )
+    assert get_best_existing_metric(client, "diabetes", "f1") == 0.8
+
+
+def test_parseable_tag_wins_over_property():
+    client = _client(
+        _model("1", tags={"F1": "0.3"}, properties={"f1": "0.9"}),
+    )
+    assert get_best_existing_metric(client, "diabetes", "f1") == 0.3
+
+
+def test_metric_aliases_match_f1_tags():
+    client = _client(_model("1", tags={"f1": "0.6"}))
+    assert get_best_existing_metric(client, "diabetes", "f1_score") == 0.6
+    client = _client(_model("1", tags={"f1_score": "0.5"}))
+    assert get_best_existing_metric(client, "diabetes", "f1-score") == 0.5
+
+
+def test_no_registered_versions_returns_none():
+    assert get_best_existing_metric(_client(), "diabetes", "f1") is None
+
+
+def test_champion_label_reads_one_version_with_aliases(monkeypatch):
+    monkeypatch.setenv("CHAMPION_LABEL", "champion")
+    client = _client(
+        _model("1", tags={"f1": "0.9"}),
+        _model("2", tags={"note": "x"}, properties={"f1": "0.4"}),
+        labels={"champion": "2"},
+    )
+    assert get_best_existing_metric(client, "diabetes", "f1_score") == 0.4
+    assert client.models.list_calls == 0
+
+
+def test_champion_label_failures_fall_back_to_scan(monkeypatch):
+    monkeypatch.setenv("CHAMPION_LABEL", "champion")
+    # Unknown label (any exception from get) and a champion without the
+    # metric both fall back to scanning every version.
+    client = _client(_model("1", tags={"f1": "0.7"}))
+    assert get_best_existing_metric(client, "diabetes", "f1") == 0.7
+    client = _client(
+        _model("1", tags={"f1": "0.7"}),
+        _model("2", tags={"f1": "n/a"}),
+        labels={"champion": "2"},
+    )
+    assert get_best_existing_metric(client, "diabetes", "f1") == 0.7
+    assert client.models.list_calls == 1
+
+
+def _run_main(tmp_path, monkeypatch, client, new_f1):
+    """Run main() against client; return the contents of improved.txt."""
+    model_dir = tmp_path / "model"
+    model_dir.mkdir(exist_ok=True)
+    (model_dir / "metrics.json").write_text(json.dumps({"f1": new_f1}))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("BEST_METRIC_CACHE_PATH", str(tmp_path / "c.json"))
+    monkeypatch.setattr(compare_metrics, "get_ml_client", lambda *a: client)
+    monkeypatch.setattr(sys, "argv", [
+        "compare_metrics.py", "--model_dir", str(model_dir),
+        "--model_name", "diabetes", "--subscription_id", "sub",
+        "--resource_group", "rg", "--workspace", "ws",
+    ])
+    assert compare_metrics.main() == 0
+    return (tmp_path / "improved.txt").read_text()
+
+
+def test_main_uses_fresh_cache_entry_without_client(tmp_path, monkeypatch):
+    client = _client(_model("1", tags={"f1": "0.7"}))
+    assert _run_main(tmp_path, monkeypatch, client, 0.5) == "false"
+    assert _run_main(tmp_path, monkeypatch, None, 0.8) == "true"
+
+
+def test_main_caches_champion_and_scan_separately(tmp_path, monkeypatch):
+    client = _client(
+        _model("1", tags={"f1": "0.9"}),
+        _model("2", tags={"f1": "0.4"}),
+        labels={"champion": "2"},
+    )
+    assert _run_main(tmp_path, monkeypatch, client, 0.5) == "false"
+    monkeypatch.setenv("CHAMPION_LABEL", "champion")
+    assert _run_main(tmp_path, monkeypatch, client, 0.5) == "true"
+
+
+def test_main_revalidates_expired_scan_entry(tmp_path, monkeypatch):
+    monkeypatch.setattr(compare_metrics, "CACHE_MAX_AGE", 0)
+    client = _client(_model("1", tags={"f1": "0.7"}), labels={"latest": "1"})
+    assert _run_main(tmp_path, monkeypatch, client, 0.5) == "false"
+    # Latest version unchanged: the expired entry is reused without a scan.
+    assert _run_main(tmp_path, monkeypatch, client, 0.5) == "false"
+    assert client.models.list_calls == 1
+    # A newer version was registered: rescan.
+    client.models.versions.append(_model("2", tags={"f1": "0.4"}))
+    client.models.labels["latest"] = "2"
+    assert _run_main(tmp_path, monkeypatch, client, 0.5) == "false"
+    assert client.models.list_calls == 2
+
+
+def test_main_rescans_when_champion_label_moves(tmp_path, monkeypatch):
+    monkeypatch.setattr(compare_metrics, "CACHE_MAX_AGE", 0)
+    monkeypatch.setenv("CHAMPION_LABEL", "champion")
+    client = _client(
+        _model("1", tags={"f1": "0.9"}),
+        _model("2", tags={"f1": "0.4"}),
+        labels={"champion": "2", "latest": "2"},
+    )
+    assert _run_main(tmp_path, monkeypatch, client, 0.5) == "true"
+    assert _run_main(tmp_path, monkeypatch, client, 0.5) == "true"
+    client.models.labels["champion"] = "1"
+    assert _run_main(tmp_path, monkeypatch, client, 0.5) == "false"
+
+
+@pytest.mark.parametrize("has_metrics, code", [(False, 2), (True, 3)])
+def test_main_error_exits_write_improved_false(
+    tmp_path, monkeypatch, has_metrics, code
+):
+    model_dir = tmp_path / "model"
+    model_dir.mkdir()
+    if has_metrics:
+        (model_dir / "metrics.json").write_text(json.dumps({"f1": 0.9}))
+    (tmp_path / "improved.txt").write_text("true")
+    monkeypatch.chdir(tmp_path)
+    for var in ("AZURE_SUBSCRIPTION_ID", "AZURE_ML_RESOURCE_GROUP",
+                "AZURE_ML_WORKSPACE_NAME"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(sys, "argv", [
+        "compare_metrics.py", "--model_dir", str(model_dir),
+        "--model_name", "diabetes",
+    ])
+    assert compare_metrics.main() == code
+    assert (tmp_path / "improved.txt").read_text() == "false"
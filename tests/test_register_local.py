@@ -0,0 +1,16 @@
+# tests/test_register_local.py
+import json
+
+from register_local import tag_value
+
+
+def test_tag_value_keeps_scalars_as_plain_strings():
+    assert tag_value(0.25) == "0.25"
+    assert tag_value(3) == "3"
+    assert tag_value("n/a") == "n/a"
+
+
+def test_tag_value_serialises_composite_metrics_as_json():
+    per_class = {0: 0.1, 1: 0.9}
+    assert json.loads(tag_value(per_class)) == {"0": 0.1, "1": 0.9}
+    assert json.loads(tag_value([0.1, 0.9])) == [0.1, 0.9]
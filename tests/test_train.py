@@ -1,4 +1,5 @@
 # tests/test_train.py
+import json
 import os
 import numpy as np
 import pandas as pd
@@ -103,11 +104,12 @@ def test_train_model_logs_metrics(monkeypatch, tmp_path):
 
     logged = {}
 
-    def fake_log_metric(name, value):
-        logged.setdefault(name, []).append(value)
+    def fake_log_metrics(metrics):
+        for name, value in metrics.items():
+            logged.setdefault(name, []).append(value)
 
     import mlflow
-    monkeypatch.setattr(mlflow, "log_metric", fake_log_metric)
+    monkeypatch.setattr(mlflow, "log_metrics", fake_log_metrics)
 
     # create an isolated output directory for this test and pass its path
     out_dir = tmp_path / "model_outputs"
@@ -120,3 +122,81 @@ def test_train_model_logs_metrics(monkeypatch, tmp_path):
         val = logged[metric][-1]
         assert isinstance(val, (int, float))
         assert 0.0 <= float(val) <= 1.0
+
+    with open(out_dir / "metrics.json") as fh:
+        saved = json.load(fh)
+    assert set(saved) == {"accuracy", "precision", "recall", "f1"}
+
+
+def test_get_csvs_df_aligns_differing_columns(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    df1 = _build_sample_dataframe(n_rows=6)
+    df2 = _build_sample_dataframe(n_rows=4).drop(columns=["cat1"])
+    _make_csv(str(d), "a.csv", df1)
+    _make_csv(str(d), "b.csv", df2)
+
+    out = get_csvs_df(str(d))
+    assert len(out) == 10
+    assert "cat1" in out.columns
+    assert out["cat1"].isnull().sum() == 4
+
+
+def test_get_csvs_df_upcasts_int_and_float_columns(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    ints = pd.DataFrame({"a": [1, 2], "label": [0, 1]})
+    floats = pd.DataFrame({"a": [1.5, 2.5], "label": [1, 0]})
+    _make_csv(str(d), "a.csv", ints)
+    _make_csv(str(d), "b.csv", floats)
+    out = get_csvs_df(str(d))
+    assert out["a"].dtype == np.float64
+    assert sorted(out["a"]) == [1.0, 1.5, 2.0, 2.5]
+
+
+def test_get_csvs_df_mixes_conflicting_column_types(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    (d / "a.csv").write_text("x,flag,label\n1,true,0\n2,false,1\n")
+    (d / "b.csv").write_text("x,flag,label\nabc,1,1\ndef,0,0\n")
+    out = get_csvs_df(str(d))
+    assert len(out) == 4
+    assert sorted(map(str, out["x"])) == ["1", "2", "abc", "def"]
+
+
+def test_get_csvs_df_reads_empty_strings_as_missing(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    (d / "a.csv").write_text(
+        "s,day,at,label\n"
+        "x,2024-01-01,2024-01-01T10:00:00,0\n"
+        ",2024-01-02,2024-01-02T11:30:00,1\n"
+    )
+    out = get_csvs_df(str(d))
+    assert out["s"].isnull().tolist() == [False, True]
+    # Dates and timestamps keep their original text, as with pd.read_csv.
+    assert out["day"].tolist() == ["2024-01-01", "2024-01-02"]
+    assert out["at"].tolist() == [
+        "2024-01-01T10:00:00", "2024-01-02T11:30:00"
+    ]
+
+
+def test_split_data_fills_nans_with_column_median():
+    df = _build_sample_dataframe(n_rows=20)
+    expected = df["num1"].median()
+    X_train, X_test, _, _ = split_data(
+        df, target_col="label", test_size=0.25, random_state=3
+    )
+    X = pd.concat([X_train, X_test])
+    assert X.loc[1, "num1"] == pytest.approx(expected)
+    assert X["flag"].dtype == np.int8
+
+
+def test_split_data_single_class_target_skips_stratify():
+    df = _build_sample_dataframe(n_rows=12)
+    df["label"] = 1
+    X_train, X_test, y_train, y_test = split_data(
+        df, target_col="label", test_size=0.25, random_state=0
+    )
+    assert len(y_train) + len(y_test) == 12
+    assert set(y_train) == {1}